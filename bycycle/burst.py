@@ -62,28 +62,51 @@ def detect_bursts_cycles(df, sig, amplitude_fraction_threshold=0.,
     Returns
     -------
     df : pandas DataFrame
-        Same df as input, with an additional column (`is_burst`) to indicate if the cycle is part
-        of an oscillatory burst, with additional columns indicating the burst detection parameters.
+        Copy of the input df, with an additional column (`is_burst`) to indicate if the cycle is
+        part of an oscillatory burst, with additional columns indicating the burst detection
+        parameters. Any existing burst columns are replaced.
 
     Notes
     -----
     * The first and last period cannot be considered oscillating if the consistency measures are used.
     """
 
-    # Compute normalized amplitude for all cycles
-    df['amp_fraction'] = df['volt_amp'].rank()/len(df)
+    burst_features = _detect_bursts_cycles(df, sig, amplitude_fraction_threshold,
+                                           amplitude_consistency_threshold,
+                                           period_consistency_threshold,
+                                           monotonicity_threshold, n_cycles_min)
+
+    return _join_burst_features(df, burst_features)
+
+
+def _detect_bursts_cycles(features, sig, amplitude_fraction_threshold=0.,
+                          amplitude_consistency_threshold=.5,
+                          period_consistency_threshold=.5,
+                          monotonicity_threshold=.8,
+                          n_cycles_min=3):
+    """Compute burst features and detect bursts, with features given as a mapping of arrays.
+
+    ``features`` may be a dictionary of 1d arrays, or a DataFrame. The burst features and
+    ``is_burst`` are returned as a dictionary of 1d arrays.
+    """
+
+    burst_features = {}
+
+    # Compute normalized amplitude for all cycles, ranking with pandas so that a NaN amplitude
+    #   leaves only its own cycle unranked
+    cycles = len(features['volt_amp'])
+    burst_features['amp_fraction'] = pd.Series(features['volt_amp']).rank().values / cycles
 
     # Compute amplitude consistency
-    cycles = len(df)
     amp_consists = np.ones(cycles) * np.nan
-    rises = df['volt_rise'].values
-    decays = df['volt_decay'].values
+    rises = np.asarray(features['volt_rise'])
+    decays = np.asarray(features['volt_decay'])
 
     for cyc in range(1, cycles-1):
 
         consist_current = np.min([rises[cyc], decays[cyc]]) / np.max([rises[cyc], decays[cyc]])
 
-        if 'sample_peak' in df.columns:
+        if 'sample_peak' in features:
             consist_last = np.min([rises[cyc], decays[cyc-1]]) / np.max([rises[cyc], decays[cyc-1]])
             consist_next = np.min([rises[cyc+1], decays[cyc]]) / np.max([rises[cyc+1], decays[cyc]])
 
@@ -93,11 +116,11 @@ def detect_bursts_cycles(df, sig, amplitude_fraction_threshold=0.,
 
         amp_consists[cyc] = np.min([consist_current, consist_next, consist_last])
 
-    df['amp_consistency'] = amp_consists
+    burst_features['amp_consistency'] = amp_consists
 
     # Compute period consistency
     period_consists = np.ones(cycles) * np.nan
-    periods = df['period'].values
+    periods = np.asarray(features['period'])
 
     for cyc in range(1, cycles-1):
 
@@ -108,49 +131,78 @@ def detect_bursts_cycles(df, sig, amplitude_fraction_threshold=0.,
 
         period_consists[cyc] = np.min([consist_next, consist_last])
 
-    df['period_consistency'] = period_consists
+    burst_features['period_consistency'] = period_consists
 
     # Compute monotonicity
-    monotonicity = np.ones(cycles) * np.nan
-
-    for idx, row in df.iterrows():
-
-        if 'sample_peak' in df.columns:
-            rise_period = sig[int(row['sample_last_trough']):int(row['sample_peak'])]
-            decay_period = sig[int(row['sample_peak']):int(row['sample_next_trough'])]
+    if 'sample_peak' in features:
+        rise_starts = np.asarray(features['sample_last_trough'], dtype=int)
+        rise_ends = decay_starts = np.asarray(features['sample_peak'], dtype=int)
+        decay_ends = np.asarray(features['sample_next_trough'], dtype=int)
 
-        else:
-            decay_period = sig[int(row['sample_last_peak']):int(row['sample_trough'])]
-            rise_period = sig[int(row['sample_trough']):int(row['sample_next_peak'])]
+    else:
+        decay_starts = np.asarray(features['sample_last_peak'], dtype=int)
+        decay_ends = rise_starts = np.asarray(features['sample_trough'], dtype=int)
+        rise_ends = np.asarray(features['sample_next_peak'], dtype=int)
 
-        decay_mono = np.mean(np.diff(decay_period) < 0)
-        rise_mono = np.mean(np.diff(rise_period) > 0)
-        monotonicity[idx] = np.mean([decay_mono, rise_mono])
+    decay_mono = _fraction_monotonic(sig, decay_starts, decay_ends, rise=False)
+    rise_mono = _fraction_monotonic(sig, rise_starts, rise_ends, rise=True)
 
-    df['monotonicity'] = monotonicity
+    burst_features['monotonicity'] = (decay_mono + rise_mono) / 2
 
     # Compute if each period is part of an oscillation
-    cycle_good_amp = df['amp_fraction'] > amplitude_fraction_threshold
-    cycle_good_amp_consist = df['amp_consistency'] > amplitude_consistency_threshold
-    cycle_good_period_consist = df['period_consistency'] > period_consistency_threshold
-    cycle_good_monotonicity = df['monotonicity'] > monotonicity_threshold
+    cycle_good_amp = burst_features['amp_fraction'] > amplitude_fraction_threshold
+    cycle_good_amp_consist = burst_features['amp_consistency'] > amplitude_consistency_threshold
+    cycle_good_period_consist = \
+        burst_features['period_consistency'] > period_consistency_threshold
+    cycle_good_monotonicity = burst_features['monotonicity'] > monotonicity_threshold
 
     is_burst = cycle_good_amp & cycle_good_amp_consist & \
         cycle_good_period_consist & cycle_good_monotonicity
     is_burst[0] = False
     is_burst[-1] = False
 
-    df['is_burst'] = is_burst
-    df = _min_consecutive_cycles(df, n_cycles_min=n_cycles_min)
-    df['is_burst'] = df['is_burst'].astype(bool)
+    burst_features['is_burst'] = _min_consecutive_cycles(is_burst, n_cycles_min=n_cycles_min)
+
+    return burst_features
+
+
+def _join_burst_features(df, burst_features):
+    """Join burst features onto a dataframe as a single block, replacing any existing ones."""
 
-    return df
+    df_burst = pd.DataFrame(burst_features, index=df.index, copy=False)
+    df = df.drop(columns=list(burst_features), errors='ignore')
 
+    return pd.concat([df, df_burst], axis=1, copy=False)
+
+
+def _fraction_monotonic(sig, starts, ends, rise=True):
+    """Compute the fraction of samples in each flank moving in the direction of the flank.
+
+    Counts of increasing (or decreasing) samples are taken from a cumulative sum over the
+    derivative of the whole signal, so each flank costs two lookups rather than a slice and diff.
+    Flanks spanning fewer than two samples are NaN.
+    """
 
-def _min_consecutive_cycles(df_shape, n_cycles_min=3):
+    diffs = np.diff(sig)
+    is_mono = diffs > 0 if rise else diffs < 0
+
+    counts = np.zeros(len(diffs) + 1, dtype=int)
+    np.cumsum(is_mono, out=counts[1:])
+
+    # Each flank contains the derivatives from its start up to the sample before its end
+    lengths = ends - starts - 1
+    valid = lengths > 0
+
+    fractions = np.full(len(starts), np.nan)
+    fractions[valid] = (counts[ends[valid] - 1] - counts[starts[valid]]) / lengths[valid]
+
+    return fractions
+
+
+def _min_consecutive_cycles(is_burst, n_cycles_min=3):
     """Enforce minimum number of consecutive cycles."""
 
-    is_burst = np.copy(df_shape['is_burst'].values)
+    is_burst = np.array(is_burst, dtype=bool)
     temp_cycle_count = 0
 
     for idx, bursting in enumerate(is_burst):
@@ -166,9 +218,7 @@ def _min_consecutive_cycles(df_shape, n_cycles_min=3):
 
             temp_cycle_count = 0
 
-    df_shape['is_burst'] = is_burst
-
-    return df_shape
+    return is_burst
 
 
 def plot_burst_detect_params(sig, fs, df_shape, osc_kwargs, tlims=None,
@@ -218,7 +268,7 @@ def plot_burst_detect_params(sig, fs, df_shape, osc_kwargs, tlims=None,
     sig = zscore(sig)
 
     # Determine time array
-    times = np.arange(0, len(sig) / fs, 1 /fs)
+    times = np.arange(len(sig)) / fs
 
     if tlims is None:
         tlims = (times[0], times[-1])
@@ -232,7 +282,7 @@ def plot_burst_detect_params(sig, fs, df_shape, osc_kwargs, tlims=None,
         side_e = 'trough'
 
     # Limit to time periods of interest
-    tidx = np.logical_and(times >= tlims[0], times < tlims[1])
+    tidx = slice(*np.searchsorted(times, tlims))
     sig = sig[tidx]
     times = times[tidx]
     df_shape = df_shape[(df_shape['sample_last_' + side_e] > int(fs * tlims[0])) &
@@ -384,25 +434,43 @@ def detect_bursts_df_amp(df, sig, fs, f_range, amp_threshes=(1, 2),
     Returns
     -------
     df : pandas DataFrame
-        Same df as input, with an additional column to indicate
+        Copy of the input df, with an additional column to indicate
         if the cycle is part of an oscillatory burst.
     """
 
+    burst_features = _detect_bursts_df_amp(df, sig, fs, f_range, amp_threshes,
+                                           n_cycles_min, filter_kwargs)
+
+    return _join_burst_features(df, burst_features)
+
+
+def _detect_bursts_df_amp(features, sig, fs, f_range, amp_threshes=(1, 2),
+                          n_cycles_min=3, filter_kwargs=None):
+    """Detect bursts with an amplitude threshold, with features given as a mapping of arrays.
+
+    ``features`` may be a dictionary of 1d arrays, or a DataFrame. ``is_burst`` is returned
+    in a dictionary.
+    """
+
+    if filter_kwargs is None:
+        filter_kwargs = {}
+
     # Detect bursts using the dual amplitude threshold approach
     sig_burst = detect_bursts_dual_threshold(sig, fs, amp_threshes, f_range,
                                              min_n_cycles=n_cycles_min, **filter_kwargs)
 
+    # Determine extrema labels
+    side_e = 'peak' if 'sample_trough' in features else 'trough'
+    starts = np.asarray(features['sample_last_' + side_e], dtype=int)
+    ends = np.asarray(features['sample_next_' + side_e], dtype=int)
+
     # Compute fraction of each cycle that's bursting
     burst_fracs = []
-    for _, row in df.iterrows():
-        fraction_bursting = np.mean(sig_burst[int(row['sample_last_trough']):
-                                              int(row['sample_next_trough'] + 1)])
+    for start, end in zip(starts, ends):
+        fraction_bursting = np.mean(sig_burst[start:end + 1])
         burst_fracs.append(fraction_bursting)
 
     # Determine cycles that are defined as bursting throughout the whole cycle
-    df['is_burst'] = [frac == 1 for frac in burst_fracs]
-
-    df = _min_consecutive_cycles(df, n_cycles_min=n_cycles_min)
-    df['is_burst'] = df['is_burst'].astype(bool)
+    is_burst = [frac == 1 for frac in burst_fracs]
 
-    return df
+    return {'is_burst': _min_consecutive_cycles(is_burst, n_cycles_min=n_cycles_min)}
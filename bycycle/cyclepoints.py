@@ -3,8 +3,11 @@ for individual cycles.
 """
 
 import numpy as np
+from scipy.signal import oaconvolve
 
-from neurodsp.filt import filter_signal
+from neurodsp.filt import filter_signal, design_fir_filter
+from neurodsp.filt.checks import check_filter_length, check_filter_properties
+from neurodsp.utils import remove_nans, restore_nans
 
 ###################################################################################################
 ###################################################################################################
@@ -48,13 +51,24 @@ def find_extrema(sig, fs, f_range, boundary=None, first_extrema='peak', filter_k
     if filter_kwargs is None:
         filter_kwargs = {}
 
+    # Narrowband filter signal
+    sig_filt = _filter_bandpass(sig, fs, f_range, **filter_kwargs)
+
+    return _find_extrema_prefiltered(sig, sig_filt, fs, f_range, boundary=boundary,
+                                     first_extrema=first_extrema)
+
+
+def _find_extrema_prefiltered(sig, sig_filt, fs, f_range, boundary=None, first_extrema='peak'):
+    """Identify peaks and troughs in a time series, given its narrowband filtered version.
+
+    This is :func:`find_extrema` without the filtering step, for when ``sig_filt`` has already
+    been computed, such that the bandpass filter is not designed and applied a second time.
+    """
+
     # Default boundary value as 1 cycle length of low cutoff frequency
     if boundary is None:
         boundary = int(np.ceil(fs / float(f_range[0])))
 
-    # Narrowband filter signal
-    sig_filt = filter_signal(sig, fs, 'bandpass', f_range, remove_edges=False, **filter_kwargs)
-
     # Find rising and falling zero-crossings (narrowband)
     zerorise_n = _fzerorise(sig_filt)
     zerofall_n = _fzerofall(sig_filt)
@@ -111,6 +125,30 @@ def find_extrema(sig, fs, f_range, boundary=None, first_extrema='peak', filter_k
     return ps, ts
 
 
+def _filter_bandpass(sig, fs, f_range, n_cycles=3, n_seconds=None, **filter_kwargs):
+    """Bandpass filter a signal, as with :func:`~neurodsp.filt.filter.filter_signal`.
+
+    The FIR filter is applied by overlap-add convolution, which is much faster than direct
+    convolution for the long kernels needed at low frequencies. If any keyword arguments other
+    than the filter length are given, the signal is filtered by ``filter_signal`` itself.
+    """
+
+    if filter_kwargs:
+        return filter_signal(sig, fs, 'bandpass', f_range, n_cycles=n_cycles, n_seconds=n_seconds,
+                             remove_edges=False, **filter_kwargs)
+
+    # Design the filter, with the same checks as filter_signal
+    filter_coefs = design_fir_filter(fs, 'bandpass', f_range, n_cycles, n_seconds)
+    check_filter_length(len(sig), len(filter_coefs))
+    check_filter_properties(filter_coefs, 1, fs, 'bandpass', f_range, verbose=False)
+
+    # Filter only the samples that are not NaN, then add the NaN edges back
+    sig, sig_nans = remove_nans(sig)
+    sig_filt = oaconvolve(sig, filter_coefs, mode='same')
+
+    return restore_nans(sig_filt, sig_nans)
+
+
 def _fzerofall(sig):
     """Find zero-crossings on falling edge of a filtered signal."""
 
@@ -182,40 +220,65 @@ def find_zerox(sig, ps, ts):
         n_decays = len(ts) - 1
         idx_bias = 1
 
-    # Find zero-crossings for rise
-    zerox_rise = np.zeros(n_rises, dtype=int)
-    for idx_rise in range(n_rises):
-        sig_temp = np.copy(sig[ts[idx_rise]:ps[idx_rise + 1 - idx_bias] + 1])
-        sig_temp -= (sig_temp[0] + sig_temp[-1]) / 2.
-
-        # If data is all zeros, just set the zero-crossing to be halfway between
-        if np.sum(np.abs(sig_temp)) == 0:
-            zerox_rise[idx_rise] = ts[idx_rise] + int(len(sig_temp) / 2.)
+    # Find zero-crossings for rises, between each trough and the following peak
+    zerox_rise = _find_flank_midpoints(sig, ts[:n_rises], ps[1 - idx_bias:n_rises + 1 - idx_bias],
+                                       rise=True)
 
-        # If rise is actually decay, just set the zero-crossing to be halfway between
-        elif sig_temp[0] > sig_temp[-1]:
-            zerox_rise[idx_rise] = ts[idx_rise] + int(len(sig_temp) / 2.)
+    # Find zero-crossings for decays, between each peak and the following trough
+    zerox_decay = _find_flank_midpoints(sig, ps[:n_decays], ts[idx_bias:n_decays + idx_bias],
+                                        rise=False)
 
-        else:
-            zerox_rise[idx_rise] = ts[idx_rise] + int(np.median(_fzerorise(sig_temp)))
+    return zerox_rise, zerox_decay
 
-    # Find zero-crossings for decays
-    zerox_decay = np.zeros(n_decays, dtype=int)
-    for idx_decay in range(n_decays):
-        sig_temp = np.copy(sig[ps[idx_decay]:ts[idx_decay + idx_bias] + 1])
-        sig_temp -= (sig_temp[0] + sig_temp[-1]) / 2.
 
-        # If data is all zeros, just set the zero-crossing to be halfway between
-        if np.sum(np.abs(sig_temp)) == 0:
-            zerox_decay[idx_decay] = ps[idx_decay] + int(len(sig_temp) / 2.)
+def _find_flank_midpoints(sig, starts, ends, rise=True):
+    """Find the temporal median midpoint crossing of each flank, for all flanks at once.
 
-        # If decay is actually rise, just set the zero-crossing to be halfway between
-        elif sig_temp[0] < sig_temp[-1]:
-            zerox_decay[idx_decay] = ps[idx_decay] + int(len(sig_temp) / 2.)
-        else:
-            zerox_decay[idx_decay] = ps[idx_decay] + int(np.median(_fzerofall(sig_temp)))
+    Each flank spans ``sig[starts[idx]:ends[idx] + 1]``, and is centered on the voltage halfway
+    between its first and last sample. If the flank goes the wrong way, or the midpoint voltage
+    is never crossed, the crossing is set to be halfway between the flank edges.
+    """
 
-    return zerox_rise, zerox_decay
+    n_flanks = len(starts)
+    if n_flanks == 0:
+        return np.zeros(0, dtype=int)
+
+    # Lay out all flanks end to end, with each sample tagged by the flank it belongs to
+    lengths = ends - starts + 1
+    offsets = np.cumsum(lengths) - lengths
+    flank_ids = np.repeat(np.arange(n_flanks), lengths)
+    samples = np.arange(len(flank_ids)) - offsets[flank_ids] + starts[flank_ids]
+
+    # Center each flank on the voltage halfway between its edges
+    sig_flanks = sig[samples].astype(float)
+    sig_flanks -= (sig_flanks[offsets] + sig_flanks[offsets + lengths - 1])[flank_ids] / 2.
+
+    # Find midpoint crossings in the direction of the flank, ignoring pairs across flanks
+    pos = sig_flanks < 0 if rise else sig_flanks > 0
+    crossings = pos[:-1] & ~pos[1:]
+    crossings[(offsets + lengths - 1)[:-1]] = False
+    crossings = crossings.nonzero()[0]
+
+    # Take the temporal median of the crossings within each flank
+    crossing_ids = flank_ids[crossings]
+    counts = np.bincount(crossing_ids, minlength=n_flanks)
+    crossings = crossings - offsets[crossing_ids]
+    crossing_offsets = np.cumsum(counts) - counts
+
+    has_crossing = counts > 0
+    mid_lo = crossing_offsets[has_crossing] + (counts[has_crossing] - 1) // 2
+    mid_hi = crossing_offsets[has_crossing] + counts[has_crossing] // 2
+
+    # Default to halfway between, which is used if the flank is flat or goes the wrong way
+    zerox = lengths // 2
+    zerox[has_crossing] = ((crossings[mid_lo] + crossings[mid_hi]) / 2.).astype(int)
+
+    sig_first = sig_flanks[offsets]
+    sig_last = sig_flanks[offsets + lengths - 1]
+    wrong_way = sig_first > sig_last if rise else sig_first < sig_last
+    zerox[wrong_way] = lengths[wrong_way] // 2
+
+    return starts + zerox
 
 
 def extrema_interpolated_phase(sig, ps, ts, zerox_rise=None, zerox_decay=None):
@@ -1,21 +1,58 @@
 """Quantify the shape of oscillatory waveforms on a cycle-by-cycle basis."""
 
 import warnings
+from functools import partial
+from multiprocessing import Pool, cpu_count
 
 import numpy as np
 import pandas as pd
+from scipy.fft import fft, ifft, next_fast_len
 
-from neurodsp.timefrequency import amp_by_time
+from neurodsp.filt import filter_signal
+from neurodsp.utils import remove_nans, restore_nans
 
 from bycycle.cyclepoints import find_extrema, find_zerox
-from bycycle.burst import detect_bursts_cycles, detect_bursts_df_amp
+from bycycle.burst import _detect_bursts_cycles, _detect_bursts_df_amp
 
 ###################################################################################################
 ###################################################################################################
 
+# Integer (sample & duration) and float (voltage & symmetry) feature columns, for peak-centered
+#   cycles, and their names for trough-centered cycles
+_INT_COLS_P = ('sample_peak', 'sample_zerox_decay', 'sample_zerox_rise', 'sample_last_trough',
+               'sample_next_trough', 'period', 'time_decay', 'time_rise', 'time_peak',
+               'time_trough')
+_FLOAT_COLS_P = ('volt_decay', 'volt_rise', 'volt_amp', 'volt_peak', 'volt_trough',
+                 'time_rdsym', 'time_ptsym', 'band_amp')
+
+_RENAME_T = {'sample_peak': 'sample_trough',
+             'sample_zerox_decay': 'sample_zerox_rise',
+             'sample_zerox_rise': 'sample_zerox_decay',
+             'sample_last_trough': 'sample_last_peak',
+             'sample_next_trough': 'sample_next_peak',
+             'time_peak': 'time_trough',
+             'time_trough': 'time_peak',
+             'volt_peak': 'volt_trough',
+             'volt_trough': 'volt_peak',
+             'time_rise': 'time_decay',
+             'time_decay': 'time_rise',
+             'volt_rise': 'volt_decay',
+             'volt_decay': 'volt_rise'}
+
+_INT_COLS_T = tuple(_RENAME_T.get(col, col) for col in _INT_COLS_P)
+_FLOAT_COLS_T = tuple(_RENAME_T.get(col, col) for col in _FLOAT_COLS_P)
+
+_COLS = {'P': (_INT_COLS_P, _FLOAT_COLS_P), 'T': (_INT_COLS_T, _FLOAT_COLS_T)}
+
+_NO_BURST_KWARGS_MSG = ('No burst detection parameters are provided. This is not recommended. '
+                        'Check your data and choose appropriate parameters for '
+                        '"burst_detection_kwargs". Default burst detection parameters are '
+                        'likely not well suited for the data.')
+
+
 def compute_features(sig, fs, f_range, center_extrema='P', burst_detection_method='cycles',
                      burst_detection_kwargs=None, find_extrema_kwargs=None,
-                     hilbert_increase_n=False):
+                     hilbert_increase_n=True, analytic_amp=None):
     """Segment a recording into individual cycles and compute features for each cycle.
 
     Parameters
@@ -44,10 +81,19 @@ def compute_features(sig, fs, f_range, center_extrema='P', burst_detection_metho
         Keyword arguments for function to find peaks an troughs (:func:`~.find_extrema`)
         to change filter Parameters or boundary.By default, it sets the filter length to three
         cycles of the low cutoff frequency (``f_range[0]``).
-    hilbert_increase_n : bool, optional, default: False
-        Corresponding kwarg for :func:`~neurodsp.timefrequency.hilbert.amp_by_time`.
-        If true, this zero-pads the signal when computing the Fourier transform, which can be
-        necessary for computing it in a reasonable amount of time.
+    hilbert_increase_n : bool, optional, default: True
+        If true, this zero-pads the signal to the next fast length (see
+        :func:`scipy.fft.next_fast_len`) when computing the Fourier transform of the Hilbert
+        transform, which avoids very slow transforms for signal lengths with large prime factors.
+        Unlike :func:`~neurodsp.timefrequency.hilbert.amp_by_time`, this does not pad to the next
+        power of two, so ``band_amp`` can differ slightly from the amplitude it returns.
+    analytic_amp : 1d array, optional
+        Precomputed analytic amplitude of ``sig``, as returned by
+        :func:`~neurodsp.timefrequency.hilbert.amp_by_time` with ``n_cycles=3``. This matches
+        the amplitude computed internally when ``hilbert_increase_n`` is False.
+        If provided, it is used to compute ``band_amp`` instead of recomputing the Hilbert
+        transform. As the amplitude of ``-sig`` is the same as that of ``sig``, the same array
+        can be reused when computing both peak and trough-centered features.
 
     Returns
     -------
@@ -90,33 +136,34 @@ def compute_features(sig, fs, f_range, center_extrema='P', burst_detection_metho
     Peak vs trough centering
         - By default, the first extrema analyzed will be a peak, and the final one a trough.
         - In order to switch the preference, the signal is simply inverted and columns are renamed.
+        - The input signal is never modified. Pass the signal itself with ``center_extrema='T'``,
+          rather than a negated copy, as it is inverted internally.
         - Columns are slightly different depending on if ``center_extrema`` is set to 'P' or 'T'.
     """
 
+    # Check the center extrema before doing any work
+    if center_extrema not in _COLS:
+        raise ValueError('Parameter "center_extrema" must be either "P" or "T"')
+
     # Set defaults if user input is None
     if burst_detection_kwargs is None:
         burst_detection_kwargs = {}
-        warnings.warn('''
-            No burst detection parameters are provided. This is not recommended.
-            Check your data and choose appropriate parameters for "burst_detection_kwargs".
-            Default burst detection parameters are likely not well suited for the data.
-            ''')
+        warnings.warn(_NO_BURST_KWARGS_MSG, stacklevel=2)
     if find_extrema_kwargs is None:
         find_extrema_kwargs = {'filter_kwargs': {'n_cycles': 3}}
     else:
         # Raise warning if switch from peak start to trough start
-        if 'first_extrema' in find_extrema_kwargs.keys():
+        if 'first_extrema' in find_extrema_kwargs:
             raise ValueError('''
                 This function assumes that the first extrema identified will be a peak.
                 This cannot be overwritten at this time.''')
 
-    # Negate signal if to analyze trough-centered cycles
-    if center_extrema == 'P':
-        pass
-    elif center_extrema == 'T':
-        sig = -sig
+    # Negate signal if to analyze trough-centered cycles, otherwise make sure the signal is a
+    #   contiguous array, so that filtering and FFTs are not run on lists or strided views
+    if center_extrema == 'T':
+        sig = np.negative(sig)
     else:
-        raise ValueError('Parameter "center_extrema" must be either "P" or "T"')
+        sig = np.ascontiguousarray(sig)
 
     # Find peak and trough locations in the signal
     ps, ts = find_extrema(sig, fs, f_range, **find_extrema_kwargs)
@@ -124,81 +171,254 @@ def compute_features(sig, fs, f_range, center_extrema='P', burst_detection_metho
     # Find zero-crossings
     zerox_rise, zerox_decay = find_zerox(sig, ps, ts)
 
-    # For each cycle, identify the sample of each extrema and zero-crossing
+    # Preallocate the features, so that each is computed in place
+    #   Integer (sample & duration) and float (voltage & symmetry) features are columns of a
+    #   single block each, which are used as is for the DataFrame
+    n_cycles = len(ts) - 1
     shape_features = {}
-    shape_features['sample_peak'] = ps[1:]
-    shape_features['sample_zerox_decay'] = zerox_decay[1:]
-    shape_features['sample_zerox_rise'] = zerox_rise
-    shape_features['sample_last_trough'] = ts[:-1]
-    shape_features['sample_next_trough'] = ts[1:]
+
+    int_features = np.empty((n_cycles, len(_INT_COLS_P)), dtype=np.int64, order='F')
+    shape_features.update(zip(_INT_COLS_P, int_features.T))
+
+    float_features = np.empty((n_cycles, len(_FLOAT_COLS_P)), order='F')
+    shape_features.update(zip(_FLOAT_COLS_P, float_features.T))
+
+    # For each cycle, identify the sample of each extrema and zero-crossing
+    shape_features['sample_peak'][:] = ps[1:]
+    shape_features['sample_zerox_decay'][:] = zerox_decay[1:]
+    shape_features['sample_zerox_rise'][:] = zerox_rise
+    shape_features['sample_last_trough'][:] = ts[:-1]
+    shape_features['sample_next_trough'][:] = ts[1:]
 
     # Compute duration of period
-    shape_features['period'] = shape_features['sample_next_trough'] - \
-        shape_features['sample_last_trough']
+    np.subtract(ts[1:], ts[:-1], out=shape_features['period'])
 
     # Compute duration of peak
-    shape_features['time_peak'] = shape_features['sample_zerox_decay'] - \
-        shape_features['sample_zerox_rise']
+    np.subtract(zerox_decay[1:], zerox_rise, out=shape_features['time_peak'])
 
     # Compute duration of last trough
-    shape_features['time_trough'] = zerox_rise - zerox_decay[:-1]
+    np.subtract(zerox_rise, zerox_decay[:-1], out=shape_features['time_trough'])
+
+    # Determine extrema voltage, reading each set of extrema from the signal once
+    volt_peak = sig[ps[1:]]
+    volt_last_trough = sig[ts[:-1]]
+    volt_next_trough = sig[ts[1:]]
 
-    # Determine extrema voltage
-    shape_features['volt_peak'] = sig[ps[1:]]
-    shape_features['volt_trough'] = sig[ts[:-1]]
+    shape_features['volt_peak'][:] = volt_peak
+    shape_features['volt_trough'][:] = volt_last_trough
+
+    # Restore the sign of the extrema voltages if the signal was negated
+    if center_extrema == 'T':
+        np.negative(shape_features['volt_peak'], out=shape_features['volt_peak'])
+        np.negative(shape_features['volt_trough'], out=shape_features['volt_trough'])
 
     # Determine rise and decay characteristics
-    shape_features['time_decay'] = (ts[1:] - ps[1:])
-    shape_features['time_rise'] = (ps[1:] - ts[:-1])
+    np.subtract(ts[1:], ps[1:], out=shape_features['time_decay'])
+    np.subtract(ps[1:], ts[:-1], out=shape_features['time_rise'])
 
-    shape_features['volt_decay'] = sig[ps[1:]] - sig[ts[1:]]
-    shape_features['volt_rise'] = sig[ps[1:]] - sig[ts[:-1]]
-    shape_features['volt_amp'] = (shape_features['volt_decay'] + shape_features['volt_rise']) / 2
+    np.subtract(volt_peak, volt_next_trough, out=shape_features['volt_decay'])
+    np.subtract(volt_peak, volt_last_trough, out=shape_features['volt_rise'])
+    np.add(shape_features['volt_decay'], shape_features['volt_rise'],
+           out=shape_features['volt_amp'])
+    shape_features['volt_amp'] /= 2
 
     # Compute rise-decay symmetry features
-    shape_features['time_rdsym'] = shape_features['time_rise'] / shape_features['period']
+    np.divide(shape_features['time_rise'], shape_features['period'],
+              out=shape_features['time_rdsym'])
 
     # Compute peak-trough symmetry features
-    shape_features['time_ptsym'] = shape_features['time_peak'] / \
-        (shape_features['time_peak'] + shape_features['time_trough'])
+    np.add(shape_features['time_peak'], shape_features['time_trough'],
+           out=shape_features['time_ptsym'])
+    np.divide(shape_features['time_peak'], shape_features['time_ptsym'],
+              out=shape_features['time_ptsym'])
+
+    # Reverse symmetry measures if cycles are trough-centered
+    if center_extrema == 'T':
+        np.subtract(1, shape_features['time_rdsym'], out=shape_features['time_rdsym'])
+        np.subtract(1, shape_features['time_ptsym'], out=shape_features['time_ptsym'])
 
     # Compute average oscillatory amplitude estimate during cycle
-    amp = amp_by_time(sig, fs, f_range, hilbert_increase_n=hilbert_increase_n, n_cycles=3)
-    shape_features['band_amp'] = [np.mean(amp[ts[sig_idx]:ts[sig_idx + 1]]) for sig_idx in
-                                  range(len(shape_features['sample_peak']))]
+    if analytic_amp is None:
+        amp = _amp_by_time(sig, fs, f_range, hilbert_increase_n=hilbert_increase_n, n_cycles=3)
+    else:
+        amp = analytic_amp
 
-    # Convert feature dictionary into a DataFrame
-    df = pd.DataFrame.from_dict(shape_features)
+    # Average amplitude over each cycle, accumulating in double precision
+    np.divide(np.add.reduceat(amp[:ts[-1]], ts[:-1], dtype=float), shape_features['period'],
+              out=shape_features['band_amp'])
 
     # Define whether or not each cycle is part of a burst
     if burst_detection_method == 'cycles':
-        df = detect_bursts_cycles(df, sig, **burst_detection_kwargs)
+        burst_features = _detect_bursts_cycles(shape_features, sig, **burst_detection_kwargs)
     elif burst_detection_method == 'amp':
-        df = detect_bursts_df_amp(df, sig, fs, f_range, **burst_detection_kwargs)
+        burst_features = _detect_bursts_df_amp(shape_features, sig, fs, f_range,
+                                               **burst_detection_kwargs)
     else:
         raise ValueError('Invalid entry for "burst_detection_method"')
 
-    # Rename columns if they are actually trough-centered
-    if center_extrema == 'T':
-        rename_dict = {'sample_peak': 'sample_trough',
-                       'sample_zerox_decay': 'sample_zerox_rise',
-                       'sample_zerox_rise': 'sample_zerox_decay',
-                       'sample_last_trough': 'sample_last_peak',
-                       'sample_next_trough': 'sample_next_peak',
-                       'time_peak': 'time_trough',
-                       'time_trough': 'time_peak',
-                       'volt_peak': 'volt_trough',
-                       'volt_trough': 'volt_peak',
-                       'time_rise': 'time_decay',
-                       'time_decay': 'time_rise',
-                       'volt_rise': 'volt_decay',
-                       'volt_decay': 'volt_rise'}
-        df.rename(columns=rename_dict, inplace=True)
-
-        # Need to reverse symmetry measures
-        df['volt_peak'] = -df['volt_peak']
-        df['volt_trough'] = -df['volt_trough']
-        df['time_rdsym'] = 1 - df['time_rdsym']
-        df['time_ptsym'] = 1 - df['time_ptsym']
+    # Convert features into a DataFrame, with one contiguous block each for the integer
+    #   and float features, followed by burst features
+    int_cols, float_cols = _COLS[center_extrema]
+    df_int = pd.DataFrame(int_features, columns=int_cols, copy=False)
+    df_float = pd.DataFrame(float_features, columns=float_cols, copy=False)
+    df_burst = pd.DataFrame(burst_features, copy=False)
+    df = pd.concat([df_int, df_float, df_burst], axis=1, copy=False)
 
     return df
+
+
+def compute_features_multi(sigs, fs, f_range, center_extrema='P',
+                           burst_detection_method='cycles', burst_detection_kwargs=None,
+                           find_extrema_kwargs=None, hilbert_increase_n=True, n_jobs=1):
+    """Compute features for each cycle of multiple signals, such as channels of a recording.
+
+    Parameters
+    ----------
+    sigs : 2d array
+        Voltage time series, with shape (n_signals, n_samples).
+    fs : float
+        Sampling rate, in Hz.
+    f_range : tuple of (float, float)
+        Frequency range for narrowband signal of interest (Hz).
+    center_extrema : {'P', 'T'}
+        The center extrema in the cycle. See :func:`~.compute_features`.
+    burst_detection_method : {'cycles', 'amp'}
+        Method for detecting bursts. See :func:`~.compute_features`.
+    burst_detection_kwargs : dict, optional
+        Keyword arguments for function to find label cycles as in or not in an oscillation.
+    find_extrema_kwargs : dict, optional
+        Keyword arguments for function to find peaks an troughs (:func:`~.find_extrema`).
+    hilbert_increase_n : bool, optional, default: True
+        If true, this zero-pads the signals to the next fast length when computing the Fourier
+        transform.
+    n_jobs : int, optional, default: 1
+        Number of jobs to run in parallel, both as workers for the Fourier transforms and as
+        processes computing the features of each signal. Negative values count back from the
+        number of available cores, such that -1 uses all of them and -2 all but one, with at
+        least one job always used.
+
+    Returns
+    -------
+    dfs : list of pandas.DataFrame
+        Dataframes containing features and identifiers for each cycle, one per signal.
+        Columns are the same as for :func:`~.compute_features`.
+
+    Notes
+    -----
+    The analytic amplitude of all signals is computed with a single batched Fourier transform,
+    after which cycles are segmented and their features computed for each signal, in separate
+    processes if ``n_jobs`` is not 1. As with any use of multiprocessing, scripts run on
+    platforms that spawn new processes (Windows and macOS) should call this function from within
+    an ``if __name__ == '__main__':`` block.
+    """
+
+    # Warn once for all signals, rather than for each
+    if burst_detection_kwargs is None:
+        burst_detection_kwargs = {}
+        warnings.warn(_NO_BURST_KWARGS_MSG, stacklevel=2)
+
+    # Resolve the number of jobs once, as the Fourier transforms and the process pool
+    #   interpret negative values differently
+    if n_jobs == 0:
+        raise ValueError('Parameter "n_jobs" must not be 0')
+    if n_jobs < 0:
+        n_jobs = max(cpu_count() + 1 + n_jobs, 1)
+
+    # Check the inputs before computing the amplitude of every signal
+    sigs = np.ascontiguousarray(sigs)
+    if sigs.ndim != 2:
+        raise ValueError('Parameter "sigs" must be a 2d array, of shape (n_signals, n_samples)')
+    if center_extrema not in _COLS:
+        raise ValueError('Parameter "center_extrema" must be either "P" or "T"')
+
+    amps = _amp_by_time(sigs, fs, f_range, hilbert_increase_n=hilbert_increase_n, n_cycles=3,
+                        n_jobs=n_jobs)
+
+    compute = partial(_compute_features_amp, fs=fs, f_range=f_range,
+                      center_extrema=center_extrema,
+                      burst_detection_method=burst_detection_method,
+                      burst_detection_kwargs=burst_detection_kwargs,
+                      find_extrema_kwargs=find_extrema_kwargs)
+
+    if n_jobs == 1:
+        dfs = [compute(sig, amp) for sig, amp in zip(sigs, amps)]
+    else:
+        with Pool(processes=min(n_jobs, len(sigs))) as pool:
+            dfs = pool.starmap(compute, zip(sigs, amps))
+
+    return dfs
+
+
+def _compute_features_amp(sig, analytic_amp, **kwargs):
+    """Compute features for a signal with a precomputed analytic amplitude."""
+
+    return compute_features(sig, analytic_amp=analytic_amp, **kwargs)
+
+
+def _amp_by_time(sig, fs, f_range, hilbert_increase_n=True, n_cycles=3, n_jobs=1):
+    """Compute the analytic amplitude of a narrowband filtered signal.
+
+    This matches :func:`~neurodsp.timefrequency.hilbert.amp_by_time`, with the analytic signal
+    formed in place on the Fourier coefficients, and the transform zero-padded to the next fast
+    length if ``hilbert_increase_n`` is True.
+
+    Single precision signals are transformed in single precision.
+    A 2d array of signals is transformed along its last axis in one batched FFT, which is
+    parallelized across signals using ``n_jobs`` workers (-1 uses all available cores).
+    """
+
+    # Keep single precision signals in single precision, halving the memory used by the FFTs
+    dtype = np.result_type(sig.dtype, np.float32)
+
+    # Narrowband filter signal, keeping the edges so the transform is defined throughout
+    if sig.ndim == 1:
+        sig_filt, filter_kernel = filter_signal(sig, fs, 'bandpass', f_range, n_cycles=n_cycles,
+                                                remove_edges=False, return_filter=True)
+        sig_filt = sig_filt.astype(dtype, copy=False)
+    else:
+        sig_filt = np.zeros(sig.shape, dtype=dtype)
+        for idx, sig_1d in enumerate(sig):
+            sig_filt[idx], filter_kernel = filter_signal(sig_1d, fs, 'bandpass', f_range,
+                                                         n_cycles=n_cycles, remove_edges=False,
+                                                         return_filter=True)
+
+    # Compute the analytic amplitude, one signal at a time if their NaN edges differ
+    sig_nans = np.isnan(sig_filt)
+    if sig_filt.ndim == 2 and (sig_nans != sig_nans[0]).any():
+        amp = np.array([_analytic_amp(sig_1d, hilbert_increase_n) for sig_1d in sig_filt])
+    else:
+        amp = _analytic_amp(sig_filt, hilbert_increase_n, n_jobs)
+
+    # Remove edge artifacts, within half the filter length of either edge
+    n_rmv = int(np.ceil(len(filter_kernel) / 2))
+    amp[..., :n_rmv] = np.nan
+    amp[..., -n_rmv:] = np.nan
+
+    return amp
+
+
+def _analytic_amp(sig, hilbert_increase_n=True, n_jobs=1):
+    """Compute the amplitude of the analytic signal along the last axis, ignoring NaN edges.
+
+    As in :func:`~neurodsp.timefrequency.hilbert.robust_hilbert`, NaNs are dropped before the
+    transform and restored afterwards. For a 2d array, NaNs must be in the same samples of all rows.
+    """
+
+    has_nans = np.isnan(sig).any()
+    if has_nans:
+        sig, sig_nans = remove_nans(sig)
+
+    n_samples = sig.shape[-1]
+    n_fft = next_fast_len(n_samples) if hilbert_increase_n else n_samples
+
+    # Double the positive frequencies and zero the negative frequencies
+    sig_fft = fft(sig, n_fft, axis=-1, workers=n_jobs)
+    sig_fft[..., 1:(n_fft + 1) // 2] *= 2
+    sig_fft[..., n_fft // 2 + 1:] = 0
+
+    amp = np.abs(ifft(sig_fft, axis=-1, workers=n_jobs)[..., :n_samples])
+
+    if has_nans:
+        amp = restore_nans(amp, sig_nans, dtype=amp.dtype)
+
+    return amp
@@ -3,6 +3,7 @@
 import itertools
 
 import numpy as np
+import pandas as pd
 
 from neurodsp.filt import  filter_signal
 from neurodsp.sim import sim_oscillation
@@ -12,6 +13,7 @@ from bycycle.features import compute_features
 import pytest
 
 from bycycle.burst import *
+from bycycle.burst import _fraction_monotonic
 
 # Set data path
 import os
@@ -49,6 +51,110 @@ def test_detect_bursts_cycles():
         itertools.groupby(df_burst_cycles['is_burst']) if key]) >= 3
 
 
+def test_detect_bursts_cycles_nan_amp():
+    """Test that a cycle with a NaN amplitude does not affect the others."""
+
+    # Load signal
+    sig = np.load(DATA_PATH + 'sim_bursting.npy')
+
+    fs = 1000
+    f_range = (6, 14)
+
+    sig_filt = filter_signal(sig, fs, 'lowpass', 30, n_seconds=.3, remove_edges=False)
+
+    df = compute_features(sig_filt, fs, f_range, burst_detection_kwargs={})
+    df_nan = df.copy()
+    df_nan.loc[10, 'volt_amp'] = np.nan
+
+    df_burst = detect_bursts_cycles(df_nan, sig_filt)
+
+    assert df_burst['amp_fraction'].isna().sum() == 1
+    assert df_burst['is_burst'].sum() > 0
+
+
+def test_detect_bursts_rescore():
+    """Test that burst detection on a dataframe replaces its burst columns in a copy."""
+
+    # Load signal
+    sig = np.load(DATA_PATH + 'sim_bursting.npy')
+
+    fs = 1000
+    f_range = (6, 14)
+
+    sig_filt = filter_signal(sig, fs, 'lowpass', 30, n_seconds=.3, remove_edges=False)
+
+    df = compute_features(sig_filt, fs, f_range,
+                          burst_detection_kwargs={'amplitude_consistency_threshold': .9,
+                                                  'period_consistency_threshold': .9})
+    df_orig = df.copy()
+
+    # Rescore with more liberal thresholds, and then by amplitude
+    df_cycles = detect_bursts_cycles(df, sig_filt, amplitude_consistency_threshold=.2,
+                                     period_consistency_threshold=.2)
+    df_amp = detect_bursts_df_amp(df, sig_filt, fs, f_range, filter_kwargs={'n_seconds': .5})
+
+    pd.testing.assert_frame_equal(df, df_orig)
+
+    assert list(df_cycles.columns) == list(df.columns)
+    assert df_cycles['is_burst'].sum() > df['is_burst'].sum()
+    pd.testing.assert_series_equal(df_cycles['amp_consistency'], df['amp_consistency'])
+
+    assert list(df_amp.columns).count('is_burst') == 1
+    assert not df_amp['is_burst'].equals(df['is_burst'])
+
+
+@pytest.mark.parametrize("rise", [True, False])
+def test_fraction_monotonic(rise):
+    """Test flank monotonicity against taking the derivative of each flank."""
+
+    rng = np.random.RandomState(0)
+    sig = rng.randn(1000)
+
+    # Include flanks too short to have a derivative
+    starts = rng.randint(0, 950, 200)
+    ends = starts + rng.randint(0, 50, 200)
+    starts = np.append(starts, [10, 20, 30])
+    ends = np.append(ends, [10, 21, 32])
+
+    fractions = _fraction_monotonic(sig, starts, ends, rise=rise)
+
+    with np.errstate(invalid='ignore'):
+        fractions_loop = [np.mean(np.diff(sig[start:end]) > 0 if rise else
+                                  np.diff(sig[start:end]) < 0)
+                          for start, end in zip(starts, ends)]
+
+    np.testing.assert_allclose(fractions, fractions_loop)
+    assert np.isnan(fractions[-3:-1]).all()
+
+
+@pytest.mark.parametrize("center_extrema", ['P', 'T'])
+def test_detect_bursts_cycles_monotonicity(center_extrema):
+    """Test cycle monotonicity for peak and trough-centered cycles."""
+
+    # Load signal
+    sig = np.load(DATA_PATH + 'sim_bursting.npy')
+
+    fs = 1000
+    f_range = (6, 14)
+
+    df = compute_features(sig, fs, f_range, center_extrema=center_extrema,
+                          burst_detection_kwargs={})
+
+    if center_extrema == 'P':
+        rise_starts, rise_ends = df['sample_last_trough'], df['sample_peak']
+        decay_starts, decay_ends = df['sample_peak'], df['sample_next_trough']
+    else:
+        decay_starts, decay_ends = df['sample_last_peak'], df['sample_trough']
+        rise_starts, rise_ends = df['sample_trough'], df['sample_next_peak']
+
+    monotonicity = [np.mean([np.mean(np.diff(sig[decay_start:decay_end]) < 0),
+                             np.mean(np.diff(sig[rise_start:rise_end]) > 0)])
+                    for decay_start, decay_end, rise_start, rise_end
+                    in zip(decay_starts, decay_ends, rise_starts, rise_ends)]
+
+    np.testing.assert_allclose(df['monotonicity'], monotonicity)
+
+
 def test_detect_bursts_df_amp():
     """Test amplitude-threshold burst detection."""
 
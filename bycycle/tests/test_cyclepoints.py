@@ -5,7 +5,11 @@ from scipy.signal import argrelextrema
 
 import pytest
 
+from neurodsp.filt import filter_signal
+
 from bycycle.cyclepoints import *
+from bycycle.cyclepoints import (_filter_bandpass, _find_extrema_prefiltered,
+                                  _find_flank_midpoints, _fzerorise, _fzerofall)
 
 # Set data path
 import os
@@ -48,6 +52,29 @@ def test_find_extrema(first_extrema):
         assert ps[0] < ts[0]
 
 
+def test_find_extrema_nan_edges():
+    """Test that NaN edges are ignored when filtering to find peaks and troughs."""
+
+    # Load signal, and set its edges to NaN as when filtered with edges removed
+    sig = np.load(DATA_PATH + 'sim_bursting.npy')
+    sig[:50] = np.nan
+    sig[-50:] = np.nan
+
+    fs = 1000
+    f_range = (6, 14)
+
+    # The bandpass filter should match neurodsp's, which filters around the NaN edges
+    sig_filt = _filter_bandpass(sig, fs, f_range)
+    sig_filt_ndsp = filter_signal(sig, fs, 'bandpass', f_range, remove_edges=False)
+    np.testing.assert_allclose(sig_filt, sig_filt_ndsp, atol=1e-10)
+
+    ps, ts = find_extrema(sig, fs, f_range)
+    ps_ndsp, ts_ndsp = _find_extrema_prefiltered(sig, sig_filt_ndsp, fs, f_range)
+
+    np.testing.assert_equal(ps, ps_ndsp)
+    np.testing.assert_equal(ts, ts_ndsp)
+
+
 def test_find_zerox():
     """Test ability to find peaks and troughs."""
 
@@ -71,6 +98,40 @@ def test_find_zerox():
     assert zerox_rise[0] < ps[1]
 
 
+@pytest.mark.parametrize("rise", [True, False])
+@pytest.mark.parametrize("dtype", [float, np.float32])
+def test_find_flank_midpoints(rise, dtype):
+    """Test flank midpoints against a loop over flanks, including degenerate flanks."""
+
+    # Integer steps give flat flanks, flanks going the wrong way, flanks with flat ends and no
+    #   midpoint crossing, and flanks with an even number of crossings
+    rng = np.random.RandomState(0)
+    sig = rng.randint(-3, 4, 2000).cumsum().astype(dtype)
+    sig[1000:1050] = sig[1000]
+
+    starts = np.sort(rng.randint(0, 1950, 300))
+    ends = starts + rng.randint(0, 50, 300)
+    starts = np.append(starts, [1000, 1010])
+    ends = np.append(ends, [1049, 1010])
+
+    zerox = _find_flank_midpoints(sig, starts, ends, rise=rise)
+
+    zerox_loop = np.zeros(len(starts), dtype=int)
+    for idx, (start, end) in enumerate(zip(starts, ends)):
+
+        sig_temp = sig[start:end + 1].astype(float)
+        sig_temp -= (sig_temp[0] + sig_temp[-1]) / 2.
+        wrong_way = sig_temp[0] > sig_temp[-1] if rise else sig_temp[0] < sig_temp[-1]
+
+        if np.sum(np.abs(sig_temp)) == 0 or wrong_way:
+            zerox_loop[idx] = start + int(len(sig_temp) / 2.)
+        else:
+            crossings = _fzerorise(sig_temp) if rise else _fzerofall(sig_temp)
+            zerox_loop[idx] = start + int(np.median(crossings))
+
+    np.testing.assert_equal(zerox, zerox_loop)
+
+
 def test_extrema_interpolated_phase():
     """Test waveform phase estimate."""
 
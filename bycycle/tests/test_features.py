@@ -1,6 +1,8 @@
 """Tests the main cycle-by-cycle feature computation function."""
 
 import numpy as np
+import pytest
+from neurodsp.timefrequency import amp_by_time
 
 from bycycle.features import *
 
@@ -36,3 +38,120 @@ def test_compute_features():
     np.testing.assert_allclose(df['period'], df_opp['period'])
     np.testing.assert_allclose(df['time_rdsym'], 1 - df_opp['time_rdsym'])
     np.testing.assert_allclose(df['time_ptsym'], 1 - df_opp['time_ptsym'])
+
+
+def test_compute_features_analytic_amp():
+    """Test cycle-by-cycle feature computation with a precomputed analytic amplitude."""
+
+    # Load signal
+    sig = np.load(DATA_PATH + 'sim_stationary.npy')
+
+    fs = 1000
+    f_range = (6, 14)
+
+    # Compute the amplitude once and reuse it for both peak and trough-centered cycles
+    amp = amp_by_time(sig, fs, f_range, n_cycles=3)
+
+    df = compute_features(sig, fs, f_range)
+    df_amp = compute_features(sig, fs, f_range, analytic_amp=amp)
+    df_opp = compute_features(-sig, fs, f_range, center_extrema='T', analytic_amp=amp)
+
+    np.testing.assert_allclose(df['band_amp'], df_amp['band_amp'])
+    np.testing.assert_allclose(df['band_amp'], df_opp['band_amp'])
+
+
+def test_compute_features_nan_edges():
+    """Test cycle-by-cycle feature computation on a signal with NaN edges."""
+
+    # Load signal, and set its edges to NaN as when filtered with edges removed
+    sig = np.load(DATA_PATH + 'sim_bursting.npy')
+    sig[:50] = np.nan
+    sig[-50:] = np.nan
+
+    fs = 1000
+    f_range = (8, 12)
+
+    amp = amp_by_time(sig, fs, f_range, n_cycles=3)
+
+    df = compute_features(sig, fs, f_range, hilbert_increase_n=False)
+    df_amp = compute_features(sig, fs, f_range, analytic_amp=amp)
+
+    assert df['band_amp'].notna().sum() > len(df) - 3
+    np.testing.assert_allclose(df['band_amp'], df_amp['band_amp'])
+
+
+def test_compute_features_float32():
+    """Test cycle-by-cycle feature computation on a single precision signal."""
+
+    # Load signal
+    sig = np.load(DATA_PATH + 'sim_stationary.npy')
+
+    fs = 1000
+    f_range = (6, 14)
+
+    df = compute_features(sig, fs, f_range)
+    df_32 = compute_features(sig.astype(np.float32), fs, f_range)
+
+    np.testing.assert_allclose(df['sample_peak'], df_32['sample_peak'])
+    np.testing.assert_allclose(df['volt_amp'], df_32['volt_amp'], rtol=1e-5)
+    np.testing.assert_allclose(df['band_amp'], df_32['band_amp'], rtol=1e-4)
+
+
+def test_compute_features_multi():
+    """Test cycle-by-cycle feature computation across multiple signals."""
+
+    # Load signals
+    sigs = np.array([np.load(DATA_PATH + 'sim_stationary.npy'),
+                     np.load(DATA_PATH + 'sim_bursting.npy')])
+
+    fs = 1000
+    f_range = (6, 14)
+    burst_kwargs = {'amplitude_fraction_threshold': 0,
+                    'amplitude_consistency_threshold': .5,
+                    'period_consistency_threshold': .5,
+                    'monotonicity_threshold': .8,
+                    'n_cycles_min': 3}
+
+    dfs = compute_features_multi(sigs, fs, f_range, burst_detection_kwargs=burst_kwargs,
+                                 n_jobs=2)
+
+    assert len(dfs) == len(sigs)
+    for sig, df in zip(sigs, dfs):
+        df_single = compute_features(sig, fs, f_range, burst_detection_kwargs=burst_kwargs)
+        np.testing.assert_allclose(df['sample_peak'], df_single['sample_peak'])
+        np.testing.assert_allclose(df['band_amp'], df_single['band_amp'])
+        assert (df['is_burst'] == df_single['is_burst']).all()
+
+
+@pytest.mark.parametrize("n_jobs",
+    [
+        2,
+        -2,
+        pytest.param(0, marks=pytest.mark.xfail(raises=ValueError))
+    ]
+)
+def test_compute_features_multi_n_jobs(n_jobs):
+    """Test the number of jobs used to compute features across multiple signals."""
+
+    sigs = np.array([np.load(DATA_PATH + 'sim_stationary.npy')] * 2)
+
+    dfs = compute_features_multi(sigs, 1000, (6, 14), burst_detection_kwargs={}, n_jobs=n_jobs)
+
+    assert len(dfs) == len(sigs)
+
+
+@pytest.mark.parametrize("sigs_ndim, center_extrema, param",
+    [
+        (1, 'P', 'sigs'),
+        (2, 'X', 'center_extrema')
+    ]
+)
+def test_compute_features_multi_invalid(sigs_ndim, center_extrema, param):
+    """Test that invalid inputs across multiple signals are caught before any computation."""
+
+    sig = np.load(DATA_PATH + 'sim_stationary.npy')
+    sigs = sig if sigs_ndim == 1 else np.array([sig] * 2)
+
+    with pytest.raises(ValueError, match=param):
+        compute_features_multi(sigs, 1000, (6, 14), center_extrema=center_extrema,
+                               burst_detection_kwargs={})
@@ -47,9 +47,9 @@ pd.options.display.max_columns = 30
 
 ####################################################################################################
 
-# Load data
-sig = np.load('data/ca1.npy') / 1000
-sig = sig[:125000]
+# Load data, reading only the samples used from disk and scaling them into single precision
+sig = np.load('data/ca1.npy', mmap_mode='r')[:125000]
+sig = np.divide(sig, 1000, dtype=np.float32)
 fs = 1250
 f_theta = (4, 10)
 f_lowpass = 30
@@ -60,9 +60,9 @@ sig_low = filter_signal(sig, fs, 'lowpass', f_lowpass,
                         n_seconds=n_seconds, remove_edges=False)
 
 # Plot signal
-times = np.arange(0, len(sig)/fs, 1/fs)
+times = np.arange(len(sig)) / fs
 tlim = (2, 5)
-tidx = np.logical_and(times>=tlim[0], times<tlim[1])
+tidx = slice(*np.searchsorted(times, tlim))
 
 plt.figure(figsize=(12, 2))
 plt.plot(times[tidx], sig[tidx], '.5')
@@ -93,16 +93,20 @@ sig_narrow = filter_signal(sig, fs, 'bandpass', f_theta,
 zerorise_narrow = _fzerorise(sig_narrow)
 zerofall_narrow = _fzerofall(sig_narrow)
 
+# Release the narrowband signal and its zerocrossings, which are not needed below
+del sig_narrow, zerorise_narrow, zerofall_narrow
+
 ####################################################################################################
 
 # Find peaks and troughs (this function also does the above)
 ps, ts = find_extrema(sig_low, fs, f_theta,
                       filter_kwargs={'n_seconds':n_seconds_theta})
 
+# Samples, peaks and troughs are sorted, so each window is a contiguous slice
 tlim = (12, 15)
-tidx = np.logical_and(times>=tlim[0], times<tlim[1])
-tidxPs = ps[np.logical_and(ps>tlim[0]*fs, ps<tlim[1]*fs)]
-tidxTs = ts[np.logical_and(ts>tlim[0]*fs, ts<tlim[1]*fs)]
+tidx = slice(*np.searchsorted(times, tlim))
+tidxPs = ps[np.searchsorted(ps, tlim[0]*fs, 'right'):np.searchsorted(ps, tlim[1]*fs)]
+tidxTs = ts[np.searchsorted(ts, tlim[0]*fs, 'right'):np.searchsorted(ts, tlim[1]*fs)]
 
 plt.figure(figsize=(12, 2))
 plt.plot(times[tidx], sig_low[tidx], 'k')
@@ -139,11 +143,13 @@ zerox_rise, zerox_decay = find_zerox(sig_low, ps, ts)
 ####################################################################################################
 
 tlim = (13, 14)
-tidx = np.logical_and(times>=tlim[0], times<tlim[1])
-tidx_ps = ps[np.logical_and(ps>tlim[0]*fs, ps<tlim[1]*fs)]
-tidx_ts = ts[np.logical_and(ts>tlim[0]*fs, ts<tlim[1]*fs)]
-tidx_ds = zerox_decay[np.logical_and(zerox_decay>tlim[0]*fs, zerox_decay<tlim[1]*fs)]
-tidx_rs = zerox_rise[np.logical_and(zerox_rise>tlim[0]*fs, zerox_rise<tlim[1]*fs)]
+tidx = slice(*np.searchsorted(times, tlim))
+tidx_ps = ps[np.searchsorted(ps, tlim[0]*fs, 'right'):np.searchsorted(ps, tlim[1]*fs)]
+tidx_ts = ts[np.searchsorted(ts, tlim[0]*fs, 'right'):np.searchsorted(ts, tlim[1]*fs)]
+tidx_ds = zerox_decay[np.searchsorted(zerox_decay, tlim[0]*fs, 'right'):
+                      np.searchsorted(zerox_decay, tlim[1]*fs)]
+tidx_rs = zerox_rise[np.searchsorted(zerox_rise, tlim[0]*fs, 'right'):
+                     np.searchsorted(zerox_rise, tlim[1]*fs)]
 
 plt.figure(figsize=(12, 2))
 plt.plot(times[tidx], sig_low[tidx], 'k')
@@ -156,6 +162,10 @@ plt.xlabel('Time (seconds)')
 plt.tight_layout()
 plt.show()
 
+# Release the lowpass signal, cycle points and plotting indices, which are not needed below
+del sig_low, times, ps, ts, zerox_rise, zerox_decay
+del tidx, tidxPs, tidxTs, tidx_ps, tidx_ts, tidx_ds, tidx_rs
+
 ####################################################################################################
 #
 # 3. Compute features of each cycle
@@ -258,7 +268,7 @@ sig = filter_signal(sig, fs, 'lowpass', 30, n_seconds=.2, remove_edges=False)
 # of the signal that do not have much apparent oscillatory burst are still labeled as if they do.
 
 ####################################################################################################
-from bycycle.burst import plot_burst_detect_params
+from bycycle.burst import detect_bursts_cycles, plot_burst_detect_params
 
 burst_kwargs = {'amplitude_fraction_threshold': 0,
                 'amplitude_consistency_threshold': .2,
@@ -283,7 +293,8 @@ burst_kwargs = {'amplitude_fraction_threshold': 0,
                 'monotonicity_threshold': .9,
                 'n_cycles_min': 3}
 
-df = compute_features(sig, fs, f_alpha, burst_detection_kwargs=burst_kwargs)
+# Cycle features do not depend on burst_kwargs, so only the burst detection is rerun
+df = detect_bursts_cycles(df, sig, **burst_kwargs)
 
 plot_burst_detect_params(sig, fs, df, burst_kwargs, tlims=None, figsize=(12, 3))
 
@@ -304,6 +315,7 @@ burst_kwargs = {'amplitude_fraction_threshold': .3,
                 'monotonicity_threshold': .8,
                 'n_cycles_min': 3}
 
-df = compute_features(sig, fs, f_alpha, burst_detection_kwargs=burst_kwargs)
+# Cycle features do not depend on burst_kwargs, so only the burst detection is rerun
+df = detect_bursts_cycles(df, sig, **burst_kwargs)
 
 plot_burst_detect_params(sig, fs, df, burst_kwargs, tlims=None, figsize=(12, 3))
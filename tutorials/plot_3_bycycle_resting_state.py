@@ -21,7 +21,7 @@ import scipy as sp
 from scipy import stats
 import matplotlib.pyplot as plt
 from neurodsp.filt import filter_signal
-from bycycle.features import compute_features
+from bycycle.features import compute_features_multi
 import pandas as pd
 import seaborn as sns
 pd.options.display.max_columns=50
@@ -33,20 +33,20 @@ pd.options.display.max_columns=50
 
 ####################################################################################################
 
-# Load experimental data
-sigs = np.load('data/sim_experiment.npy')
+# Load experimental data, in single precision as this is plenty for the features computed below
+sigs = np.load('data/sim_experiment.npy').astype(np.float32)
 fs = 1000  # Sampling rate
 
-# Apply lowpass filter to each signal
-for idx in range(len(sigs)):
-    sigs[idx] = filter_signal(sigs[idx], fs, 'lowpass', 30, n_seconds=.2, remove_edges=False)
+# Apply lowpass filter to all signals at once, designing the filter a single time and writing the
+#   result back into the single precision array
+sigs[:] = filter_signal(sigs, fs, 'lowpass', 30, n_seconds=.2, remove_edges=False)
 
 ####################################################################################################
 
 # Plot an example signal
-n_signals = len(sigs)
-n_seconds = len(sigs[0])/fs
-times = np.arange(0, n_seconds, 1/fs)
+n_signals, n_samples = sigs.shape
+n_seconds = n_samples / fs
+times = np.arange(n_samples) / fs
 
 plt.figure(figsize=(16,3))
 plt.plot(times, sigs[0], 'k')
@@ -67,18 +67,16 @@ burst_kwargs = {'amplitude_fraction_threshold': .2,
                 'monotonicity_threshold': .8,
                 'n_cycles_min': 3} # Tuned burst detection parameters
 
-# Compute features for each signal and concatenate into single dataframe
-dfs = []
-for idx in range(n_signals):
-    df = compute_features(sigs[idx], fs, f_alpha,
-                          burst_detection_kwargs=burst_kwargs)
-    if idx >= int(n_signals/2):
-        df['group'] = 'patient'
-    else:
-        df['group'] = 'control'
-    df['subject_id'] = idx
-    dfs.append(df)
-df_cycles = pd.concat(dfs)
+# Compute features for each signal
+dfs = compute_features_multi(sigs, fs, f_alpha, burst_detection_kwargs=burst_kwargs)
+
+# Concatenate into single dataframe and label the cycles of each signal, storing the group as a
+#   categorical and the subject as a small integer to keep grouping cheap
+df_cycles = pd.concat(dfs, ignore_index=True, copy=False)
+subject_id = np.repeat(np.arange(n_signals, dtype=np.int16), [len(df) for df in dfs])
+df_cycles['group'] = pd.Categorical.from_codes((subject_id >= int(n_signals/2)).astype(np.int8),
+                                               categories=['control', 'patient'])
+df_cycles['subject_id'] = subject_id
 
 ####################################################################################################
 
@@ -112,12 +110,15 @@ plot_burst_detect_params(sigs[subj], fs, sig_df,
 
 ####################################################################################################
 
-# Only consider cycles that were identified to be in bursting regimes
-df_cycles_burst = df_cycles[df_cycles['is_burst']]
+# Only consider cycles that were identified to be in bursting regimes, keeping just the columns
+#   needed to compare subjects
+features_keep = ['volt_amp', 'period', 'time_rdsym', 'time_ptsym']
+df_cycles_burst = df_cycles.loc[df_cycles['is_burst'].values,
+                                ['group', 'subject_id'] + features_keep]
 
 # Compute average features across subjects in a recording
-features_keep = ['volt_amp', 'period', 'time_rdsym', 'time_ptsym']
-df_subjects = df_cycles_burst.groupby(['group', 'subject_id']).mean()[features_keep].reset_index()
+df_subjects = df_cycles_burst.groupby(['group', 'subject_id'], observed=True)[features_keep].mean()
+df_subjects = df_subjects.reset_index()
 print(df_subjects)
 
 ####################################################################################################
@@ -126,14 +127,21 @@ feature_names = {'volt_amp': 'Amplitude',
                  'period': 'Period (ms)',
                  'time_rdsym': 'Rise-decay symmetry',
                  'time_ptsym': 'Peak-trough symmetry'}
-for feat, feat_name in feature_names.items():
-    graph = sns.catplot(x='group', y=feat, data=df_subjects)
-    plt.xlabel('')
-    plt.xticks(size=20)
-    plt.ylabel(feat_name, size=20)
-    plt.yticks(size=15)
-    plt.tight_layout()
-    plt.show()
+
+# Plot all features in a single figure, with one panel per feature
+df_features = df_subjects.melt(id_vars=['group', 'subject_id'], value_vars=list(feature_names),
+                               var_name='feature')
+df_features['feature'] = df_features['feature'].map(feature_names)
+
+graph = sns.catplot(x='group', y='value', col='feature', col_wrap=2, sharey=False,
+                    data=df_features)
+graph.set_titles('{col_name}', size=20)
+graph.set_axis_labels('', '')
+for ax in graph.axes.flat:
+    ax.tick_params(axis='x', labelsize=20)
+    ax.tick_params(axis='y', labelsize=15)
+plt.tight_layout()
+plt.show()
 
 ####################################################################################################
 #
@@ -142,8 +150,10 @@ for feat, feat_name in feature_names.items():
 
 ####################################################################################################
 
-for feat, feat_name in feature_names.items():
-    x_treatment = df_subjects[df_subjects['group']=='patient'][feat]
-    x_control = df_subjects[df_subjects['group']=='control'][feat]
-    ustat, pval = stats.mannwhitneyu(x_treatment, x_control)
+# Test all features at once, with subjects along the rows and features along the columns
+is_patient = (df_subjects['group'] == 'patient').values
+x_features = df_subjects[list(feature_names)].values
+ustats, pvals = stats.mannwhitneyu(x_features[is_patient], x_features[~is_patient], axis=0)
+
+for feat_name, ustat, pval in zip(feature_names.values(), ustats, pvals):
     print('{:20s} difference between groups, U= {:3.0f}, p={:.5f}'.format(feat_name, ustat, pval))